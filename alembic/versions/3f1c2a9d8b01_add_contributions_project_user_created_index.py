@@ -0,0 +1,32 @@
+"""add contributions project user created index
+
+The first revision; it expects the tables created from app.models.database.
+
+Revision ID: 3f1c2a9d8b01
+Revises: 
+Create Date: 2026-10-14 09:31:25.782960
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c2a9d8b01'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_contributions_project_user_created',
+        'contributions',
+        ['project_id', 'user_id', 'created_at']
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_contributions_project_user_created', table_name='contributions')
@@ -0,0 +1,44 @@
+"""add payments batch_id and history indexes
+
+Payments created before this revision have no batch id: the on-chain id was
+only ever passed to createBatch, never stored. Those still pending cannot be
+settled through PaymentService.process_batch_payment, so they are flagged with
+the "legacy" status instead of staying pending forever.
+
+Revision ID: 7a4e5b2c9d10
+Revises: 3f1c2a9d8b01
+Create Date: 2026-10-14 09:40:12.418530
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7a4e5b2c9d10'
+down_revision: Union[str, None] = '3f1c2a9d8b01'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('payments', sa.Column('batch_id', sa.String(), nullable=True))
+    op.create_index('ix_payments_batch_id', 'payments', ['batch_id'])
+    op.create_index('ix_payments_project_created', 'payments', ['project_id', 'created_at'])
+    op.create_index('ix_payments_recipient_created', 'payments', ['recipient_id', 'created_at'])
+    
+    op.execute(
+        "UPDATE payments SET status = 'legacy' "
+        "WHERE batch_id IS NULL AND status = 'pending'"
+    )
+
+
+def downgrade() -> None:
+    op.execute("UPDATE payments SET status = 'pending' WHERE status = 'legacy'")
+    
+    op.drop_index('ix_payments_recipient_created', table_name='payments')
+    op.drop_index('ix_payments_project_created', table_name='payments')
+    op.drop_index('ix_payments_batch_id', table_name='payments')
+    op.drop_column('payments', 'batch_id')
@@ -0,0 +1,8 @@
+from functools import lru_cache
+import orjson
+
+@lru_cache(maxsize=None)
+def load_abi(path: str) -> list:
+    """Load a contract ABI from a compiled artifact, parsed once per process"""
+    with open(path, 'rb') as f:
+        return orjson.loads(f.read())['abi']
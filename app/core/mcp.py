@@ -1,6 +1,13 @@
 from typing import Dict, Any, List
+from collections import OrderedDict
+from hashlib import blake2b
 from pydantic import BaseModel
 from enum import Enum
+import orjson
+import threading
+
+# Distinct contexts whose ratios are kept for reuse
+RATIO_CACHE_SIZE = 128
 
 class PaymentType(str, Enum):
     CONTRIBUTION = "contribution"
@@ -17,82 +24,90 @@ class PaymentContext(BaseModel):
 
 class MCPPaymentModel:
     def __init__(self):
-        self._context: Dict[str, Any] = {}
-    
-    def set_context(self, context: PaymentContext):
-        """Set the payment context"""
-        self._context = context.dict()
+        # Per-recipient ratios keyed by a digest of the inputs that determine them, least recent first
+        self._ratio_cache = OrderedDict()
+        self._ratio_cache_lock = threading.Lock()
     
-    def get_context(self) -> Dict[str, Any]:
-        """Get the current payment context"""
-        return self._context
+    def calculate_distribution(self, context: PaymentContext) -> Dict[str, float]:
+        """Calculate payment distribution for the given context"""
+        amount = context.amount
+        recipients = context.recipients
+        
+        # Nothing to weigh
+        if not recipients:
+            return {}
+        if amount == 0:
+            return dict.fromkeys(recipients, 0.0)
+        
+        ratios = self._get_ratios(context)
+        return {recipient: amount * ratio for recipient, ratio in ratios.items()}
     
-    def calculate_distribution(self) -> Dict[str, float]:
-        """Calculate payment distribution based on context"""
-        payment_type = self._context.get("payment_type")
-        amount = self._context.get("amount", 0)
-        recipients = self._context.get("recipients", [])
-        metadata = self._context.get("metadata", {})
+    def _get_ratios(self, context: PaymentContext) -> Dict[str, float]:
+        """Get per-recipient shares of the total, reusing them for a context with the same content"""
+        key = self._ratio_cache_key(context)
+        if key is None:
+            return self._calculate_ratios(context.payment_type, context.recipients, context.metadata)
         
+        with self._ratio_cache_lock:
+            ratios = self._ratio_cache.get(key)
+            if ratios is not None:
+                self._ratio_cache.move_to_end(key)
+                return ratios
+        
+        ratios = self._calculate_ratios(context.payment_type, context.recipients, context.metadata)
+        with self._ratio_cache_lock:
+            self._ratio_cache[key] = ratios
+            if len(self._ratio_cache) > RATIO_CACHE_SIZE:
+                self._ratio_cache.popitem(last=False)
+        return ratios
+    
+    def _ratio_cache_key(self, context: PaymentContext):
+        """Digest the payment type, recipients and metadata, or None if they cannot be serialized"""
+        try:
+            encoded = orjson.dumps(
+                [context.payment_type, context.recipients, context.metadata],
+                option=orjson.OPT_SORT_KEYS
+            )
+        except TypeError:
+            return None
+        return blake2b(encoded, digest_size=16).digest()
+    
+    def _calculate_ratios(self, payment_type: PaymentType, recipients: List[str], metadata: Dict[str, Any]) -> Dict[str, float]:
+        """Calculate each recipient's share of the total based on the payment type"""
         if payment_type == PaymentType.CONTRIBUTION:
-            return self._contribution_based_distribution(amount, recipients, metadata)
+            return self._contribution_based_ratios(recipients, metadata)
         elif payment_type == PaymentType.TIME_BASED:
-            return self._time_based_distribution(amount, recipients, metadata)
+            return self._time_based_ratios(recipients, metadata)
         elif payment_type == PaymentType.MILESTONE:
-            return self._milestone_based_distribution(amount, recipients, metadata)
+            return self._milestone_based_ratios(recipients, metadata)
         elif payment_type == PaymentType.REPUTATION:
-            return self._reputation_based_distribution(amount, recipients, metadata)
+            return self._reputation_based_ratios(recipients, metadata)
         
-        return {recipient: amount / len(recipients) for recipient in recipients}
+        return dict.fromkeys(recipients, 1 / len(recipients))
     
-    def _contribution_based_distribution(self, amount: float, recipients: List[str], metadata: Dict[str, Any]) -> Dict[str, float]:
+    def _contribution_based_ratios(self, recipients: List[str], metadata: Dict[str, Any]) -> Dict[str, float]:
         """Distribute based on contribution metrics (commits, PRs, etc.)"""
-        contributions = metadata.get("contributions", {})
-        total_contributions = sum(contributions.values())
-        
-        if total_contributions == 0:
-            return {recipient: amount / len(recipients) for recipient in recipients}
-        
-        return {
-            recipient: amount * (contributions.get(recipient, 0) / total_contributions)
-            for recipient in recipients
-        }
+        return self._weighted_ratios(recipients, metadata.get("contributions", {}))
     
-    def _time_based_distribution(self, amount: float, recipients: List[str], metadata: Dict[str, Any]) -> Dict[str, float]:
+    def _time_based_ratios(self, recipients: List[str], metadata: Dict[str, Any]) -> Dict[str, float]:
         """Distribute based on time spent"""
-        time_spent = metadata.get("time_spent", {})
-        total_time = sum(time_spent.values())
-        
-        if total_time == 0:
-            return {recipient: amount / len(recipients) for recipient in recipients}
-        
-        return {
-            recipient: amount * (time_spent.get(recipient, 0) / total_time)
-            for recipient in recipients
-        }
+        return self._weighted_ratios(recipients, metadata.get("time_spent", {}))
     
-    def _milestone_based_distribution(self, amount: float, recipients: List[str], metadata: Dict[str, Any]) -> Dict[str, float]:
+    def _milestone_based_ratios(self, recipients: List[str], metadata: Dict[str, Any]) -> Dict[str, float]:
         """Distribute based on milestone completion"""
-        milestones_completed = metadata.get("milestones_completed", {})
-        total_milestones = sum(milestones_completed.values())
-        
-        if total_milestones == 0:
-            return {recipient: amount / len(recipients) for recipient in recipients}
-        
-        return {
-            recipient: amount * (milestones_completed.get(recipient, 0) / total_milestones)
-            for recipient in recipients
-        }
+        return self._weighted_ratios(recipients, metadata.get("milestones_completed", {}))
     
-    def _reputation_based_distribution(self, amount: float, recipients: List[str], metadata: Dict[str, Any]) -> Dict[str, float]:
+    def _reputation_based_ratios(self, recipients: List[str], metadata: Dict[str, Any]) -> Dict[str, float]:
         """Distribute based on reputation scores"""
-        reputation_scores = metadata.get("reputation_scores", {})
-        total_reputation = sum(reputation_scores.values())
+        return self._weighted_ratios(recipients, metadata.get("reputation_scores", {}))
+    
+    def _weighted_ratios(self, recipients: List[str], weights: Dict[str, float]) -> Dict[str, float]:
+        """Share proportionally to weights, falling back to an equal split"""
+        total_weight = sum(weights.values())
         
-        if total_reputation == 0:
-            return {recipient: amount / len(recipients) for recipient in recipients}
+        if total_weight == 0:
+            return dict.fromkeys(recipients, 1 / len(recipients))
         
-        return {
-            recipient: amount * (reputation_scores.get(recipient, 0) / total_reputation)
-            for recipient in recipients
-        }
+        scale = 1 / total_weight
+        get_weight = weights.get
+        return {recipient: get_weight(recipient, 0) * scale for recipient in recipients}
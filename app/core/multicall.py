@@ -0,0 +1,73 @@
+from functools import lru_cache
+from typing import List, Sequence
+from eth_utils.abi import collapse_if_tuple
+from web3 import Web3
+from web3.contract import Contract
+
+# Multicall3 is deployed at the same address on mainnet and most EVM chains
+MULTICALL3_ADDRESS = '0xcA11bde05977b3631167028862bE2a173976CA11'
+
+# Only the aggregate3 entry point is needed
+MULTICALL3_ABI = [
+    {
+        'name': 'aggregate3',
+        'type': 'function',
+        'stateMutability': 'payable',
+        'inputs': [
+            {
+                'name': 'calls',
+                'type': 'tuple[]',
+                'components': [
+                    {'name': 'target', 'type': 'address'},
+                    {'name': 'allowFailure', 'type': 'bool'},
+                    {'name': 'callData', 'type': 'bytes'},
+                ],
+            }
+        ],
+        'outputs': [
+            {
+                'name': 'returnData',
+                'type': 'tuple[]',
+                'components': [
+                    {'name': 'success', 'type': 'bool'},
+                    {'name': 'returnData', 'type': 'bytes'},
+                ],
+            }
+        ],
+    }
+]
+
+@lru_cache(maxsize=None)
+def _is_deployed(web3: Web3, address: str) -> bool:
+    """Check once per client whether the aggregator has code at ``address``"""
+    return len(web3.eth.get_code(address)) > 0
+
+class Multicall:
+    """Aggregate read-only contract calls into a single eth_call via Multicall3"""
+
+    def __init__(self, web3: Web3, address: str = MULTICALL3_ADDRESS):
+        self.web3 = web3
+        self.contract = web3.eth.contract(address=Web3.to_checksum_address(address), abi=MULTICALL3_ABI)
+
+    def call(self, contract: Contract, fn_name: str, args_list: Sequence[Sequence]) -> List[tuple]:
+        """Call ``fn_name`` on ``contract`` once per argument tuple and return the decoded outputs in order.
+
+        Falls back to one eth_call per call on chains without Multicall3,
+        such as a fresh local node.
+        """
+        if not args_list:
+            return []
+        function = contract.get_function_by_name(fn_name)
+        if not _is_deployed(self.web3, self.contract.address):
+            return [self._as_tuple(function(*args).call()) for args in args_list]
+        
+        calls = [(contract.address, False, contract.encodeABI(fn_name=fn_name, args=args)) for args in args_list]
+        results = self.contract.functions.aggregate3(calls).call()
+        
+        # Tuple outputs decode by their full component signature, e.g. (address,uint256)
+        output_types = [collapse_if_tuple(output) for output in function.abi['outputs']]
+        return [self.web3.codec.decode(output_types, return_data) for _, return_data in results]
+
+    def _as_tuple(self, result) -> tuple:
+        """Match the decoded shape for single-output functions"""
+        return result if isinstance(result, (list, tuple)) else (result,)
@@ -3,22 +3,29 @@ from eth_account.messages import encode_defunct
 from web3 import Web3
 from eth_typing import ChecksumAddress
 from dotenv import load_dotenv
+from app.core.contracts import load_abi
+from app.core.multicall import Multicall, MULTICALL3_ADDRESS
+from app.core.provider import get_web3
+from app.core.transactions import (
+    ether_to_wei, get_tx_params_cache, send_transaction, send_transactions, transaction_error, wait_for_receipt
+)
+from typing import Dict, List
+import asyncio
 import os
-import json
 
 # Load environment variables
 load_dotenv()
 
 class PaymentProcessor:
     def __init__(self):
-        self.web3 = Web3(Web3.HTTPProvider(os.getenv('WEB3_PROVIDER_URL', 'http://localhost:8545')))
-        self.private_key = os.getenv('SIGNER_PRIVATE_KEY')
-        self.account = Account.from_key(self.private_key)
+        self.web3 = get_web3(os.getenv('WEB3_PROVIDER_URL', 'http://localhost:8545'))
+        # Signing account for every transaction and payment signature
+        self.account = Account.from_key(os.getenv('SIGNER_PRIVATE_KEY'))
+        self.tx_params = get_tx_params_cache(self.web3, self.account.address)
         
-        # Load contract ABI from out directory
-        with open('out/PaymentDistributor.sol/PaymentDistributor.json', 'r') as f:
-            contract_json = json.load(f)
-            self.contract_abi = contract_json['abi']
+        # Load contract ABI from out directory; it must expose the
+        # createBatch(recipients, amounts) / processPayment interface the frontend uses
+        self.contract_abi = load_abi('out/PaymentDistributor.sol/PaymentDistributor.json')
         
         # Convert contract address to checksum format
         contract_address = os.getenv('PAYMENT_DISTRIBUTOR_ADDRESS')
@@ -30,6 +37,7 @@ class PaymentProcessor:
             address=self.contract_address,
             abi=self.contract_abi
         )
+        self.multicall = Multicall(self.web3, os.getenv('MULTICALL3_ADDRESS', MULTICALL3_ADDRESS))
 
     def create_batch(self, recipients: list[str], amounts: list[int]) -> str:
         """Create a new batch payment"""
@@ -37,17 +45,11 @@ class PaymentProcessor:
         recipients = [Web3.to_checksum_address(addr) for addr in recipients]
         
         # Create batch on contract
-        tx = self.contract.functions.createBatch(recipients, amounts).build_transaction({
-            'from': self.account.address,
-            'gas': 2000000,
-            'gasPrice': self.web3.eth.gas_price,
-            'nonce': self.web3.eth.get_transaction_count(self.account.address),
-        })
-        
-        # Sign and send transaction
-        signed_tx = self.web3.eth.account.sign_transaction(tx, self.private_key)
-        tx_hash = self.web3.eth.send_raw_transaction(signed_tx.rawTransaction)
+        function = self.contract.functions.createBatch(recipients, amounts)
+        tx_hash = send_transaction(self.tx_params, self.account, function)
         receipt = self.web3.eth.wait_for_transaction_receipt(tx_hash)
+        if receipt['status'] != 1:
+            raise ValueError(f"createBatch transaction {tx_hash.hex()} reverted")
         
         # Get batch ID from event
         batch_created_event = self.contract.events.BatchCreatedEvent().process_receipt(receipt)[0]
@@ -55,40 +57,90 @@ class PaymentProcessor:
 
     def sign_payment(self, batch_id: str, index: int, recipient: ChecksumAddress, amount: int) -> str:
         """Sign a payment for processing"""
+        self.verify_payment(batch_id, index, recipient, amount)
+        return self._sign_message(batch_id, index, recipient, amount)
+
+    def verify_payment(self, batch_id: str, index: int, recipient: ChecksumAddress, amount: int):
+        """Check that an on-chain batch entry matches the expected payment"""
         # Get payment details from contract
         payment = self.contract.functions.batchPayments(batch_id, index).call()
+        self._check_payment(payment, recipient, amount)
+
+    def verify_payments(self, batch_id: str, recipients: List[ChecksumAddress], amounts: List[int]):
+        """Check every on-chain entry of a batch with a single aggregated eth_call"""
+        payments = self.multicall.call(
+            self.contract,
+            'batchPayments',
+            [(batch_id, index) for index in range(len(recipients))]
+        )
+        for payment, recipient, amount in zip(payments, recipients, amounts):
+            self._check_payment(payment, recipient, amount)
+
+    def process_payment(self, batch_id: str, index: int, signature: str) -> dict:
+        """Process a payment with signature"""
+        function = self.contract.functions.processPayment(batch_id, index, signature)
+        tx_hash = send_transaction(self.tx_params, self.account, function)
+        receipt = self.web3.eth.wait_for_transaction_receipt(tx_hash)
         
-        # Verify payment details
+        return self._transaction_result(tx_hash, receipt)
+
+    async def process_payments(self, distribution: Dict[str, float]) -> List[dict]:
+        """Create a batch for a distribution, verify it and pay out every entry"""
+        recipients = [Web3.to_checksum_address(addr) for addr in distribution]
+        amounts = ether_to_wei(distribution.values())
+        
+        batch_id = await asyncio.to_thread(self.create_batch, recipients, amounts)
+        
+        # Check every batch entry before paying out anything
+        await asyncio.to_thread(self.verify_payments, batch_id, recipients, amounts)
+        
+        # Pre-sign one processPayment per entry and send them all before awaiting any receipt
+        functions = [
+            self.contract.functions.processPayment(
+                batch_id, index, self._sign_message(batch_id, index, recipient, amount)
+            )
+            for index, (recipient, amount) in enumerate(zip(recipients, amounts))
+        ]
+        tx_hashes = await asyncio.to_thread(send_transactions, self.tx_params, self.account, functions)
+        
+        receipts = await asyncio.gather(
+            *(wait_for_receipt(self.web3, tx_hash) for tx_hash in tx_hashes),
+            return_exceptions=True
+        )
+        return [
+            self._transaction_result(tx_hash, receipt)
+            for tx_hash, receipt in zip(tx_hashes, receipts)
+        ]
+
+    def _transaction_result(self, tx_hash, receipt) -> dict:
+        """Report a transaction as succeeded or failed from its receipt status"""
+        error = transaction_error(tx_hash, receipt)
+        if error is not None:
+            return {
+                'status': 'failed',
+                'transaction_hash': None if isinstance(tx_hash, Exception) else tx_hash.hex(),
+                'error': error
+            }
+        return {
+            'status': 'success',
+            'transaction_hash': tx_hash.hex(),
+            'block_number': receipt['blockNumber']
+        }
+
+    def _check_payment(self, payment: tuple, recipient: ChecksumAddress, amount: int):
+        """Verify payment details read from the contract"""
         if payment[0].lower() != recipient.lower():
             raise ValueError("Recipient mismatch")
         if payment[1] != amount:
             raise ValueError("Amount mismatch")
         if payment[2]:
             raise ValueError("Payment already processed")
-            
-        # Create and sign message
+
+    def _sign_message(self, batch_id: str, index: int, recipient: ChecksumAddress, amount: int) -> str:
+        """Sign a payment that has already been checked against the contract"""
         message = self.web3.solidity_keccak(
             ['bytes32', 'uint256', 'address', 'uint256'],
             [batch_id, index, recipient, amount]
         )
-        signed_message = Account.sign_message(encode_defunct(message), self.private_key)
+        signed_message = self.account.sign_message(encode_defunct(primitive=message))
         return signed_message.signature.hex()
-
-    def process_payment(self, batch_id: str, index: int, signature: str) -> dict:
-        """Process a payment with signature"""
-        tx = self.contract.functions.processPayment(batch_id, index, signature).build_transaction({
-            'from': self.account.address,
-            'gas': 2000000,
-            'gasPrice': self.web3.eth.gas_price,
-            'nonce': self.web3.eth.get_transaction_count(self.account.address),
-        })
-        
-        signed_tx = self.web3.eth.account.sign_transaction(tx, self.private_key)
-        tx_hash = self.web3.eth.send_raw_transaction(signed_tx.rawTransaction)
-        receipt = self.web3.eth.wait_for_transaction_receipt(tx_hash)
-        
-        return {
-            'status': 'success',
-            'transaction_hash': tx_hash.hex(),
-            'block_number': receipt.blockNumber
-        }
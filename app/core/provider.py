@@ -0,0 +1,17 @@
+from functools import lru_cache
+from requests.adapters import HTTPAdapter
+from web3 import Web3
+import requests
+
+def make_http_provider(endpoint_uri: str, pool_size: int = 32) -> Web3.HTTPProvider:
+    """Create an HTTPProvider on a keep-alive session sized for concurrent RPC calls"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return Web3.HTTPProvider(endpoint_uri, session=session)
+
+@lru_cache(maxsize=None)
+def get_web3(endpoint_uri: str) -> Web3:
+    """Get the process-wide Web3 client for an endpoint, sharing its pooled session"""
+    return Web3(make_http_provider(endpoint_uri))
@@ -0,0 +1,153 @@
+from contextlib import contextmanager
+from decimal import Decimal
+from typing import Iterable, Iterator, List, Optional
+from web3 import Web3
+import asyncio
+import threading
+import time
+
+WEI_PER_ETHER = 10**18
+
+def ether_to_wei(amounts: Iterable[float]) -> List[int]:
+    """Convert ether amounts to wei, matching ``Web3.to_wei(amount, 'ether')``.
+
+    The float goes through its shortest ``str`` form into ``Decimal``, as
+    ``to_wei`` does, without its per-call unit lookup and type dispatch.
+    """
+    return [int(Decimal(str(amount)) * WEI_PER_ETHER) for amount in amounts]
+
+class TxParamsCache:
+    """Track the nonce and gas price for one sending account locally.
+
+    The nonce is read from the node once and then incremented per transaction;
+    the gas price is refreshed at most every ``gas_price_ttl`` seconds and the
+    chain id is fetched once, so ``build_transaction`` never has to ask for it.
+    """
+
+    def __init__(self, web3: Web3, address: str, gas_price_ttl: float = 2.0):
+        self.web3 = web3
+        self.address = address
+        self.gas_price_ttl = gas_price_ttl
+        self._nonce = None
+        self._gas_price = None
+        self._gas_price_fetched_at = 0.0
+        self._chain_id = None
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def reserve_nonces(self, count: int = 1) -> Iterator[range]:
+        """Reserve ``count`` consecutive nonces for the duration of a block.
+
+        Any exception raised inside the block means the transactions were not
+        all sent, so the tracked nonce is dropped and re-read from the node
+        rather than leaving a gap that would stall every later transaction.
+        """
+        with self._lock:
+            if self._nonce is None:
+                self._nonce = self.web3.eth.get_transaction_count(self.address, 'pending')
+            start = self._nonce
+            self._nonce += count
+        try:
+            yield range(start, start + count)
+        except Exception:
+            self.reset()
+            raise
+
+    def build(self, nonce: int, gas: int = 2000000) -> dict:
+        """Build transaction parameters from a reserved nonce and the cached gas price and chain id"""
+        return {
+            'from': self.address,
+            'chainId': self.chain_id(),
+            'gas': gas,
+            'gasPrice': self.gas_price(),
+            'nonce': nonce,
+        }
+
+    def gas_price(self) -> int:
+        """Get the current gas price, refetching once the cached value is stale"""
+        with self._lock:
+            now = time.monotonic()
+            if self._gas_price is None or now - self._gas_price_fetched_at > self.gas_price_ttl:
+                self._gas_price = self.web3.eth.gas_price
+                self._gas_price_fetched_at = now
+            return self._gas_price
+
+    def chain_id(self) -> int:
+        """Get the chain id, fetching it from the node on first use"""
+        with self._lock:
+            if self._chain_id is None:
+                self._chain_id = self.web3.eth.chain_id
+            return self._chain_id
+
+    def reset(self):
+        """Drop the cached nonce and gas price so both are re-read from the node"""
+        with self._lock:
+            self._nonce = None
+            self._gas_price = None
+
+def send_transactions(tx_params: TxParamsCache, account, functions: list) -> list:
+    """Sign contract calls on consecutive nonces, then send them back to back.
+
+    Returns one entry per call: its tx hash, or the exception that kept it from
+    being sent. Once a send is rejected the later transactions would sit behind
+    the nonce gap, so they are not sent and the nonce is re-read from the node.
+    """
+    with tx_params.reserve_nonces(len(functions)) as nonces:
+        signed_txs = [
+            account.sign_transaction(function.build_transaction(tx_params.build(nonce)))
+            for function, nonce in zip(functions, nonces)
+        ]
+
+    results = []
+    error = None
+    for signed_tx in signed_txs:
+        if error is None:
+            try:
+                results.append(tx_params.web3.eth.send_raw_transaction(signed_tx.rawTransaction))
+                continue
+            except Exception as exc:
+                tx_params.reset()
+                error = exc
+        results.append(error)
+    return results
+
+def send_transaction(tx_params: TxParamsCache, account, function):
+    """Sign and send a single contract call, raising if it could not be sent"""
+    (result,) = send_transactions(tx_params, account, [function])
+    if isinstance(result, Exception):
+        raise result
+    return result
+
+async def wait_for_receipt(web3: Web3, tx_hash):
+    """Wait for a receipt in a worker thread, re-raising the error of a send that failed"""
+    if isinstance(tx_hash, Exception):
+        raise tx_hash
+    return await asyncio.to_thread(web3.eth.wait_for_transaction_receipt, tx_hash)
+
+def transaction_error(tx_hash, receipt) -> Optional[str]:
+    """Describe why a transaction failed, or return None if its receipt shows success.
+
+    Either argument may be an exception: a send from send_transactions that
+    failed, or a receipt wait gathered with ``return_exceptions=True``.
+    """
+    if isinstance(tx_hash, Exception):
+        return str(tx_hash)
+    if isinstance(receipt, Exception):
+        return str(receipt)
+    if receipt['status'] != 1:
+        return "Transaction failed"
+    return None
+
+_shared_caches = {}
+_shared_caches_lock = threading.Lock()
+
+def get_tx_params_cache(web3: Web3, address: str) -> TxParamsCache:
+    """Get the cache shared by every sender of ``address`` on this client.
+
+    Separate caches for one account would hand out the same nonces.
+    """
+    with _shared_caches_lock:
+        key = (web3, address)
+        if key not in _shared_caches:
+            _shared_caches[key] = TxParamsCache(web3, address)
+        return _shared_caches[key]
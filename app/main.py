@@ -1,10 +1,11 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
 from typing import List, Dict, Any
 from app.core.mcp import MCPPaymentModel, PaymentContext, PaymentType
 from app.core.payment_processor import PaymentProcessor
 
 app = FastAPI(title="MCP Payment Distribution System")
+# Shared across requests; each request's context is passed to the call
 payment_model = MCPPaymentModel()
 payment_processor = PaymentProcessor()
 
@@ -33,27 +34,32 @@ class PaymentRequest(BaseModel):
 async def calculate_distribution(request: PaymentRequest):
     """Calculate payment distribution based on the provided context"""
     context = PaymentContext(**request.dict())
-    payment_model.set_context(context)
-    distribution = payment_model.calculate_distribution()
+    distribution = payment_model.calculate_distribution(context)
     return {"distribution": distribution}
 
 @app.post("/process-payment")
 async def process_payment(request: PaymentRequest):
     """Calculate and process payments"""
     context = PaymentContext(**request.dict())
-    payment_model.set_context(context)
-    distribution = payment_model.calculate_distribution()
+    distribution = payment_model.calculate_distribution(context)
     
     try:
         transactions = await payment_processor.process_payments(distribution)
         return {
-            "status": "success",
+            "status": _overall_status(transactions),
             "distribution": distribution,
             "transactions": transactions
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def _overall_status(transactions: List[dict]) -> str:
+    """Summarize per-payout statuses as success, partial or failed"""
+    succeeded = sum(transaction["status"] == "success" for transaction in transactions)
+    if succeeded == len(transactions):
+        return "success"
+    return "partial" if succeeded else "failed"
+
 @app.get("/payment-types")
 async def get_payment_types():
     """Get available payment types"""
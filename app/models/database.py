@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Index, Enum as SQLEnum
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -43,6 +43,11 @@ class Contribution(Base):
     
     user = relationship("User", back_populates="contributions")
     project = relationship("Project", back_populates="contributions")
+    
+    __table_args__ = (
+        # Covers per-user score lookups and per-project aggregation over a time window
+        Index("ix_contributions_project_user_created", "project_id", "user_id", "created_at"),
+    )
 
 class Payment(Base):
     __tablename__ = "payments"
@@ -53,12 +58,19 @@ class Payment(Base):
     amount = Column(Float)
     currency = Column(String)
     payment_type = Column(SQLEnum(PaymentType))
+    batch_id = Column(String, index=True)  # on-chain PaymentDistributor batch id
     tx_hash = Column(String)
-    status = Column(String)  # pending, completed, failed
+    status = Column(String)  # pending, completed, failed, legacy (created before batch_id)
     created_at = Column(DateTime, default=datetime.utcnow)
     
     project = relationship("Project", back_populates="payments")
     recipient = relationship("User", back_populates="payments_received")
+    
+    __table_args__ = (
+        # Payment history filters on project or recipient and pages newest first
+        Index("ix_payments_project_created", "project_id", "created_at"),
+        Index("ix_payments_recipient_created", "recipient_id", "created_at"),
+    )
 
 class Milestone(Base):
     __tablename__ = "milestones"
@@ -1,31 +1,76 @@
 from typing import List, Dict, Any
 from datetime import datetime, timedelta
+from sqlalchemy import case, func
 from sqlalchemy.orm import Session
+from yarl import URL
 from app.models.database import User, Contribution, Project
 import aiohttp
-import json
+import asyncio
+import logging
+import orjson
+
+logger = logging.getLogger(__name__)
+
+# Score multiplier per contribution type
+CONTRIBUTION_WEIGHTS = {
+    "commit": 1.0,
+    "pr": 3.0,
+    "issue": 0.5,
+}
+
+# Fields of the GitHub payloads kept in Contribution.data
+PR_FIELDS = ("number", "title", "state", "created_at", "closed_at", "merged_at", "html_url")
+ISSUE_FIELDS = ("number", "title", "state", "created_at", "closed_at", "html_url")
+
+GITHUB_API_URL = "https://api.github.com"
+
+# Largest page the GitHub REST API serves, and the most pages read per listing
+GITHUB_PER_PAGE = 100
+GITHUB_MAX_PAGES = 10
 
 class ContributionTracker:
     def __init__(self, db: Session):
         self.db = db
-        
+        self._session: aiohttp.ClientSession = None
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+    
+    async def close(self):
+        """Close the shared HTTP session"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+    
     async def track_github_contributions(self, project_id: int, github_url: str) -> List[Dict]:
         """Track contributions from GitHub repository"""
         owner, repo = self._parse_github_url(github_url)
         contributions = []
         
-        async with aiohttp.ClientSession() as session:
-            # Get commits
-            commits = await self._fetch_github_data(session, f"repos/{owner}/{repo}/commits")
-            contributions.extend(self._process_commits(commits, project_id))
-            
-            # Get pull requests
-            prs = await self._fetch_github_data(session, f"repos/{owner}/{repo}/pulls?state=all")
-            contributions.extend(self._process_prs(prs, project_id))
-            
-            # Get issues
-            issues = await self._fetch_github_data(session, f"repos/{owner}/{repo}/issues?state=all")
-            contributions.extend(self._process_issues(issues, project_id))
+        session = self._get_session()
+        # Commits, pull requests and issues are independent, so fetch them concurrently
+        commits, prs, issues = await asyncio.gather(
+            self._fetch_github_data(session, f"repos/{owner}/{repo}/commits"),
+            self._fetch_github_data(session, f"repos/{owner}/{repo}/pulls?state=all"),
+            self._fetch_github_data(session, f"repos/{owner}/{repo}/issues?state=all"),
+        )
+        
+        commits = [commit for commit in commits if commit.get("author")]
+        issues = [issue for issue in issues if not issue.get("pull_request")]
+        
+        # Get or create a user for every author
+        user_ids = self._get_user_ids(
+            [commit["author"]["login"] for commit in commits]
+            + [pr["user"]["login"] for pr in prs]
+            + [issue["user"]["login"] for issue in issues]
+        )
+        
+        contributions.extend(self._process_commits(commits, project_id, user_ids))
+        contributions.extend(self._process_prs(prs, project_id, user_ids))
+        contributions.extend(self._process_issues(issues, project_id, user_ids))
         
         return contributions
     
@@ -41,34 +86,38 @@ class ContributionTracker:
         
         score = 0.0
         for contrib in contributions:
-            if contrib.type == "commit":
-                score += 1.0 * contrib.value
-            elif contrib.type == "pr":
-                score += 3.0 * contrib.value
-            elif contrib.type == "issue":
-                score += 0.5 * contrib.value
+            score += CONTRIBUTION_WEIGHTS.get(contrib.type, 0.0) * contrib.value
         
         return score
     
-    def get_top_contributors(self, project_id: int, limit: int = 10) -> List[Dict[str, Any]]:
-        """Get top contributors for a project"""
+    def get_top_contributors(self, project_id: int, limit: int = 10, timeframe_days: int = 30) -> List[Dict[str, Any]]:
+        """Get top contributors for a project, ranked by contribution score"""
+        cutoff_date = datetime.utcnow() - timedelta(days=timeframe_days)
+        
+        # Same scoring as calculate_contribution_score, aggregated in SQL for all users at once
+        weight = case(CONTRIBUTION_WEIGHTS, value=Contribution.type, else_=0.0)
+        score = func.coalesce(
+            func.sum(case((Contribution.created_at >= cutoff_date, weight * Contribution.value), else_=0.0)),
+            0.0
+        ).label("score")
+        
         contributors = (
-            self.db.query(User, Contribution)
+            self.db.query(User.id, User.username, score)
             .join(Contribution)
             .filter(Contribution.project_id == project_id)
-            .group_by(User.id)
-            .order_by(Contribution.value.desc())
+            .group_by(User.id, User.username)
+            .order_by(score.desc())
             .limit(limit)
             .all()
         )
         
         return [
             {
-                "user_id": user.id,
-                "username": user.username,
-                "score": self.calculate_contribution_score(user.id, project_id)
+                "user_id": user_id,
+                "username": username,
+                "score": user_score
             }
-            for user, _ in contributors
+            for user_id, username, user_score in contributors
         ]
     
     def _parse_github_url(self, url: str) -> tuple:
@@ -76,60 +125,117 @@ class ContributionTracker:
         parts = url.strip("/").split("/")
         return parts[-2], parts[-1]
     
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Get the shared HTTP session, creating it on first use"""
+        if self._session is None or self._session.closed:
+            # Keep connections to api.github.com alive across calls
+            connector = aiohttp.TCPConnector(limit=20, ttl_dns_cache=300)
+            github_token = "your_github_token"  # Should be in env vars
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                headers={"Authorization": f"token {github_token}"}
+            )
+        return self._session
+    
     async def _fetch_github_data(self, session: aiohttp.ClientSession, endpoint: str) -> List[Dict]:
-        """Fetch data from GitHub API"""
-        github_token = "your_github_token"  # Should be in env vars
-        headers = {"Authorization": f"token {github_token}"}
-        async with session.get(f"https://api.github.com/{endpoint}", headers=headers) as response:
-            return await response.json()
+        """Fetch every page of a GitHub API listing, up to GITHUB_MAX_PAGES"""
+        url = URL(f"{GITHUB_API_URL}/{endpoint}").update_query(per_page=GITHUB_PER_PAGE)
+        items, links = await self._fetch_github_page(session, url)
+        
+        # The first page's Link header names the last page, so the rest are fetched concurrently
+        last = links.get("last")
+        if last is None:
+            return items
+        last_page = int(last["url"].query.get("page", 1))
+        if last_page > GITHUB_MAX_PAGES:
+            logger.warning("Reading %d of %d pages of %s", GITHUB_MAX_PAGES, last_page, endpoint)
+        
+        pages = await asyncio.gather(*(
+            self._fetch_github_page(session, url.update_query(page=page))
+            for page in range(2, min(last_page, GITHUB_MAX_PAGES) + 1)
+        ))
+        for page_items, _ in pages:
+            items.extend(page_items)
+        return items
     
-    def _process_commits(self, commits: List[Dict], project_id: int) -> List[Dict]:
+    async def _fetch_github_page(self, session: aiohttp.ClientSession, url: URL) -> tuple:
+        """Fetch one page from GitHub API, returning its items and parsed Link header"""
+        async with session.get(url) as response:
+            # A rate-limit or error body is a JSON object, not a page of items
+            response.raise_for_status()
+            return await response.json(loads=orjson.loads), response.links
+    
+    def _process_commits(self, commits: List[Dict], project_id: int, user_ids: Dict[str, int]) -> List[Dict]:
         """Process GitHub commits data"""
         return [
             {
                 "type": "commit",
                 "project_id": project_id,
-                "user_id": self._get_user_id(commit["author"]["login"]),
+                "user_id": user_ids[commit["author"]["login"]],
                 "value": self._calculate_commit_value(commit),
-                "data": json.dumps(commit)
+                "data": orjson.dumps(self._commit_data(commit)).decode()
             }
-            for commit in commits if commit.get("author")
+            for commit in commits
         ]
     
-    def _process_prs(self, prs: List[Dict], project_id: int) -> List[Dict]:
+    def _process_prs(self, prs: List[Dict], project_id: int, user_ids: Dict[str, int]) -> List[Dict]:
         """Process GitHub pull requests data"""
         return [
             {
                 "type": "pr",
                 "project_id": project_id,
-                "user_id": self._get_user_id(pr["user"]["login"]),
+                "user_id": user_ids[pr["user"]["login"]],
                 "value": self._calculate_pr_value(pr),
-                "data": json.dumps(pr)
+                "data": orjson.dumps({field: pr.get(field) for field in PR_FIELDS}).decode()
             }
             for pr in prs
         ]
     
-    def _process_issues(self, issues: List[Dict], project_id: int) -> List[Dict]:
+    def _process_issues(self, issues: List[Dict], project_id: int, user_ids: Dict[str, int]) -> List[Dict]:
         """Process GitHub issues data"""
         return [
             {
                 "type": "issue",
                 "project_id": project_id,
-                "user_id": self._get_user_id(issue["user"]["login"]),
+                "user_id": user_ids[issue["user"]["login"]],
                 "value": self._calculate_issue_value(issue),
-                "data": json.dumps(issue)
+                "data": orjson.dumps({field: issue.get(field) for field in ISSUE_FIELDS}).decode()
             }
-            for issue in issues if not issue.get("pull_request")
+            for issue in issues
         ]
     
-    def _get_user_id(self, github_username: str) -> int:
-        """Get or create user by GitHub username"""
-        user = self.db.query(User).filter(User.username == github_username).first()
-        if not user:
-            user = User(username=github_username)
-            self.db.add(user)
+    def _get_user_ids(self, github_usernames: List[str]) -> Dict[str, int]:
+        """Get or create users by GitHub username, returning a username -> id map"""
+        usernames = set(github_usernames)
+        if not usernames:
+            return {}
+        
+        user_ids = dict(
+            self.db.query(User.username, User.id)
+            .filter(User.username.in_(usernames))
+            .all()
+        )
+        
+        missing = usernames - user_ids.keys()
+        if missing:
+            new_users = [User(username=username) for username in missing]
+            self.db.add_all(new_users)
+            self.db.flush()
+            # Read ids before commit expires the instances
+            user_ids.update((user.username, user.id) for user in new_users)
             self.db.commit()
-        return user.id
+        
+        return user_ids
+    
+    def _commit_data(self, commit: Dict) -> Dict:
+        """Project the commit fields worth storing out of the API payload"""
+        details = commit.get("commit", {})
+        return {
+            "sha": commit.get("sha"),
+            "message": details.get("message"),
+            "date": (details.get("author") or {}).get("date"),
+            "html_url": commit.get("html_url"),
+        }
     
     def _calculate_commit_value(self, commit: Dict) -> float:
         """Calculate value of a commit based on changes"""
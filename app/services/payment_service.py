@@ -2,16 +2,36 @@ from typing import List, Dict, Any
 from datetime import datetime
 from web3 import Web3
 from eth_account import Account
+from sqlalchemy import and_, insert, or_, select, update
 from sqlalchemy.orm import Session
 from app.models.database import Payment, User, Project
 from app.core.mcp import PaymentType
-import json
+from app.core.contracts import load_abi
+from app.core.provider import get_web3
+from app.core.transactions import (
+    ether_to_wei, get_tx_params_cache, send_transaction, send_transactions, transaction_error, wait_for_receipt
+)
+import asyncio
+import itertools
+import os
+import secrets
+
+_batch_counter = itertools.count()
+
+# Payment history page size when none is given, and the most a caller may ask for
+HISTORY_PAGE_SIZE = 100
+HISTORY_MAX_PAGE_SIZE = 500
 
 class PaymentService:
-    def __init__(self, db: Session, web3_provider: str, contract_address: str):
+    def __init__(self, db: Session, web3_provider: str, contract_address: str, private_key: str = None):
         self.db = db
-        self.w3 = Web3(Web3.HTTPProvider(web3_provider))
+        # Services are built per session; the client and its connection pool are shared
+        self.w3 = get_web3(web3_provider)
         self.contract = self._load_contract(contract_address)
+        # The signing account is derived on the first send, so read-only use needs no key
+        self._private_key = private_key
+        self._account = None
+        self._tx_params = None
         
     def create_batch_payment(
         self,
@@ -21,128 +41,244 @@ class PaymentService:
         currency: str
     ) -> str:
         """Create a batch payment transaction"""
-        batch_id = self.w3.keccak(text=f"{project_id}-{datetime.utcnow().timestamp()}").hex()
-        
-        # Create payment records
-        payments = []
-        for address, amount in distributions.items():
-            payment = Payment(
-                project_id=project_id,
-                recipient_id=self._get_user_id(address),
-                amount=amount,
-                currency=currency,
-                payment_type=payment_type,
-                status="pending",
-                tx_hash=""
-            )
-            payments.append(payment)
-            self.db.add(payment)
-        
-        self.db.commit()
-        
-        # Prepare contract call
-        recipients = [p.recipient.address for p in payments]
-        amounts = [self.w3.to_wei(p.amount, 'ether') for p in payments]
-        
-        # Build transaction
-        tx = self.contract.functions.createBatch(
-            batch_id,
-            recipients,
-            amounts
-        ).build_transaction({
-            'from': self.w3.eth.default_account,
-            'gas': 2000000,
-            'gasPrice': self.w3.eth.gas_price,
-            'nonce': self.w3.eth.get_transaction_count(self.w3.eth.default_account)
-        })
-        
-        # Sign and send transaction
-        signed_tx = self.w3.eth.account.sign_transaction(tx, private_key='your_private_key')
-        tx_hash = self.w3.eth.send_raw_transaction(signed_tx.rawTransaction)
-        
-        # Update payment records with tx_hash
-        for payment in payments:
-            payment.tx_hash = tx_hash.hex()
-        self.db.commit()
-        
-        return batch_id
+        # Generate batch ID
+        batch_id = Web3.keccak(self._batch_seed(project_id))
+        
+        # Users and pending payment rows commit before anything is sent,
+        # so a batch that reaches the chain always has its rows
+        try:
+            # Get or create a user for every recipient
+            user_ids = self._get_user_ids(distributions)
+            
+            # Create payment records as plain mappings in one executemany INSERT
+            self.db.execute(insert(Payment), [
+                {
+                    "project_id": project_id,
+                    "recipient_id": user_ids[address],
+                    "amount": amount,
+                    "currency": currency,
+                    "payment_type": payment_type,
+                    "status": "pending",
+                    "batch_id": batch_id.hex(),
+                    "tx_hash": ""
+                }
+                for address, amount in distributions.items()
+            ])
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        
+        # Prepare contract call; the distribution already holds each recipient's address
+        recipients = list(distributions)
+        amounts = ether_to_wei(distributions.values())
+        
+        try:
+            # Build, sign and send transaction
+            tx_hash = self._send_transaction(self.contract.functions.createBatch(
+                batch_id,
+                recipients,
+                amounts
+            )).hex()
+        except Exception:
+            # Nothing was sent, so these payments can never settle
+            self._update_batch(batch_id.hex(), status="failed")
+            raise
+        
+        # The transaction is out; if its hash cannot be stored it must still reach the caller
+        try:
+            self._update_batch(batch_id.hex(), tx_hash=tx_hash)
+        except Exception as exc:
+            raise RuntimeError(
+                f"Batch {batch_id.hex()} was sent in transaction {tx_hash} but its payments were not updated"
+            ) from exc
+        
+        return batch_id.hex()
     
     def process_batch_payment(self, batch_id: str) -> Dict[str, Any]:
         """Process a batch payment"""
-        # Call contract to process batch
-        tx = self.contract.functions.processBatch(batch_id).build_transaction({
-            'from': self.w3.eth.default_account,
-            'gas': 2000000,
-            'gasPrice': self.w3.eth.gas_price,
-            'nonce': self.w3.eth.get_transaction_count(self.w3.eth.default_account)
-        })
-        
-        signed_tx = self.w3.eth.account.sign_transaction(tx, private_key='your_private_key')
-        tx_hash = self.w3.eth.send_raw_transaction(signed_tx.rawTransaction)
+        tx_hash = self._send_process_batch(batch_id)
         
         # Wait for transaction receipt
         receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash)
+        return self._record_batch_result(batch_id, tx_hash, receipt)
+    
+    async def process_batch_payments(self, batch_ids: List[str]) -> List[Dict[str, Any]]:
+        """Process several independent batches, overlapping their on-chain round-trips"""
+        # Sign every processBatch up front and send them in nonce order, off the event loop
+        account = self._get_account()
+        functions = [self.contract.functions.processBatch(batch_id) for batch_id in batch_ids]
+        tx_hashes = await asyncio.to_thread(send_transactions, self._tx_params, account, functions)
         
-        # Update payment statuses
-        if receipt['status'] == 1:
-            payments = self.db.query(Payment).filter(Payment.tx_hash == tx_hash.hex()).all()
-            for payment in payments:
-                payment.status = "completed"
+        # Receipts are awaited in worker threads; the session is only touched from this thread.
+        # One failed batch must not hide the outcome, or the hash, of the others
+        receipts = await asyncio.gather(
+            *(wait_for_receipt(self.w3, tx_hash) for tx_hash in tx_hashes),
+            return_exceptions=True
+        )
+        return [
+            self._batch_outcome(batch_id, tx_hash, receipt)
+            for batch_id, tx_hash, receipt in zip(batch_ids, tx_hashes, receipts)
+        ]
+    
+    def _batch_outcome(self, batch_id: str, tx_hash, receipt) -> Dict[str, Any]:
+        """Record one batch of a concurrent run, reporting a database error instead of raising it"""
+        try:
+            return self._record_batch_result(batch_id, tx_hash, receipt)
+        except Exception as exc:
+            self.db.rollback()
+            return {"status": "failed", "batch_id": batch_id, "tx_hash": tx_hash.hex(), "error": str(exc)}
+    
+    def _send_process_batch(self, batch_id: str):
+        """Sign and send the processBatch transaction without waiting for it"""
+        # Call contract to process batch
+        return self._send_transaction(self.contract.functions.processBatch(batch_id))
+    
+    def _record_batch_result(self, batch_id: str, tx_hash, receipt) -> Dict[str, Any]:
+        """Update payment statuses from a processBatch receipt"""
+        error = transaction_error(tx_hash, receipt)
+        if error is None:
+            payments_processed = self._update_batch(batch_id, status="completed")
+            if payments_processed:
+                return {
+                    "status": "success",
+                    "batch_id": batch_id,
+                    "tx_hash": tx_hash.hex(),
+                    "payments_processed": payments_processed
+                }
+            # Settled on chain, but no payment row carries this batch id
+            error = "No payments recorded for batch"
+        
+        return {
+            "status": "failed",
+            "batch_id": batch_id,
+            "tx_hash": None if isinstance(tx_hash, Exception) else tx_hash.hex(),
+            "error": error
+        }
+    
+    def _update_batch(self, batch_id: str, **values) -> int:
+        """Set columns on every payment of a batch, returning the number of rows updated"""
+        try:
+            result = self.db.execute(
+                update(Payment)
+                .where(Payment.batch_id == batch_id)
+                .values(**values),
+                execution_options={"synchronize_session": False}
+            )
             self.db.commit()
-            
-            return {
-                "status": "success",
-                "batch_id": batch_id,
-                "tx_hash": tx_hash.hex(),
-                "payments_processed": len(payments)
-            }
-        else:
-            return {
-                "status": "failed",
-                "batch_id": batch_id,
-                "tx_hash": tx_hash.hex(),
-                "error": "Transaction failed"
-            }
+        except Exception:
+            self.db.rollback()
+            raise
+        return result.rowcount
     
-    def get_payment_history(self, user_id: int = None, project_id: int = None) -> List[Dict]:
-        """Get payment history with optional filters"""
-        query = self.db.query(Payment)
+    def get_payment_history(
+        self,
+        user_id: int = None,
+        project_id: int = None,
+        limit: int = HISTORY_PAGE_SIZE,
+        before: datetime = None,
+        before_id: int = None
+    ) -> Dict[str, Any]:
+        """Get one page of payment history, newest first, with optional filters.
+
+        Pass the returned ``next_cursor`` back as keyword arguments
+        (``**next_cursor``) to continue after the last row; it is None once
+        there are no more pages.
+        """
+        # Select the returned columns with the recipient's username; labels match the response keys
+        query = (
+            select(
+                Payment.id,
+                User.username.label("recipient"),
+                Payment.amount,
+                Payment.currency,
+                Payment.payment_type,
+                Payment.status,
+                Payment.tx_hash,
+                Payment.created_at
+            )
+            .outerjoin(User, Payment.recipient_id == User.id)
+        )
         
         if user_id:
-            query = query.filter(Payment.recipient_id == user_id)
+            query = query.where(Payment.recipient_id == user_id)
         if project_id:
-            query = query.filter(Payment.project_id == project_id)
-            
-        payments = query.order_by(Payment.created_at.desc()).all()
+            query = query.where(Payment.project_id == project_id)
         
-        return [
-            {
-                "id": p.id,
-                "recipient": p.recipient.username,
-                "amount": p.amount,
-                "currency": p.currency,
-                "payment_type": p.payment_type,
-                "status": p.status,
-                "tx_hash": p.tx_hash,
-                "created_at": p.created_at.isoformat()
-            }
-            for p in payments
-        ]
+        # Continue after the previous page; the id breaks ties between payments created at the same instant
+        if before is not None:
+            if before_id is None:
+                query = query.where(Payment.created_at < before)
+            else:
+                query = query.where(or_(
+                    Payment.created_at < before,
+                    and_(Payment.created_at == before, Payment.id < before_id)
+                ))
+        
+        # One extra row tells whether another page follows
+        limit = max(1, min(limit, HISTORY_MAX_PAGE_SIZE))
+        query = query.order_by(Payment.created_at.desc(), Payment.id.desc()).limit(limit + 1)
+        rows = self.db.execute(query).all()
+        
+        history = []
+        for row in rows[:limit]:
+            entry = row._asdict()
+            entry["created_at"] = row.created_at.isoformat()
+            history.append(entry)
+        
+        next_cursor = None
+        if len(rows) > limit:
+            last = rows[limit - 1]
+            next_cursor = {"before": last.created_at, "before_id": last.id}
+        
+        return {"payments": history, "next_cursor": next_cursor}
+    
+    def _batch_seed(self, project_id: int) -> bytes:
+        """Build a unique batch id preimage from fixed-width integers and a random nonce"""
+        # The counter keeps ids distinct within a process, the nonce across processes and restarts
+        return (
+            project_id.to_bytes(32, 'big')
+            + next(_batch_counter).to_bytes(8, 'big')
+            + secrets.token_bytes(16)
+        )
+    
+    def _get_account(self):
+        """Derive the signing account on first use and sign every transaction with it"""
+        if self._account is None:
+            self._account = Account.from_key(self._private_key or os.getenv('SIGNER_PRIVATE_KEY'))
+            self._tx_params = get_tx_params_cache(self.w3, self._account.address)
+        return self._account
+    
+    def _send_transaction(self, function):
+        """Sign and send a contract call under a reserved nonce"""
+        account = self._get_account()
+        return send_transaction(self._tx_params, account, function)
     
     def _load_contract(self, address: str):
         """Load the payment distributor contract"""
-        with open('contracts/PaymentDistributor.json') as f:
-            contract_json = json.load(f)
         return self.w3.eth.contract(
             address=address,
-            abi=contract_json['abi']
+            abi=load_abi('contracts/PaymentDistributor.json')
         )
     
-    def _get_user_id(self, address: str) -> int:
-        """Get or create user by Ethereum address"""
-        user = self.db.query(User).filter(User.address == address).first()
-        if not user:
-            user = User(address=address)
-            self.db.add(user)
-            self.db.commit()
-        return user.id
+    def _get_user_ids(self, addresses: List[str]) -> Dict[str, int]:
+        """Get or create users by Ethereum address, returning an address -> id map"""
+        addresses = set(addresses)
+        if not addresses:
+            return {}
+        
+        user_ids = dict(
+            self.db.query(User.address, User.id)
+            .filter(User.address.in_(addresses))
+            .all()
+        )
+        
+        missing = addresses - user_ids.keys()
+        if missing:
+            new_users = [User(address=address) for address in missing]
+            self.db.add_all(new_users)
+            # Flush for the generated ids; the caller owns the transaction
+            self.db.flush()
+            user_ids.update((user.address, user.id) for user in new_users)
+        
+        return user_ids
@@ -0,0 +1,13 @@
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from app.models.database import Base
+import pytest
+
+@pytest.fixture
+def db():
+    """An in-memory SQLite session with the full schema"""
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+    engine.dispose()
@@ -0,0 +1,100 @@
+from types import SimpleNamespace
+from hexbytes import HexBytes
+from web3 import Web3
+
+class FakeFunction:
+    """A bound contract call that records itself when built or called"""
+
+    def __init__(self, contract, name, args):
+        self.contract = contract
+        self.name = name
+        self.args = args
+        self.address = contract.address
+
+    def build_transaction(self, params):
+        self.contract.built.append((self.name, self.args))
+        return {**params, 'to': self.address, 'data': '0x', 'value': 0}
+
+    def call(self):
+        return self.contract.views[(self.name, *self.args)]
+
+class FakeFunctions:
+    def __init__(self, contract):
+        self._contract = contract
+
+    def __getattr__(self, name):
+        return lambda *args: FakeFunction(self._contract, name, args)
+
+class FakeContract:
+    """A contract whose view results are preset and whose transactions are recorded"""
+
+    def __init__(self, address):
+        self.address = address
+        self.functions = FakeFunctions(self)
+        self.views = {}
+        self.built = []
+        self.batch_id = HexBytes(b'\x01' * 32)
+        self.events = SimpleNamespace(BatchCreatedEvent=lambda: SimpleNamespace(
+            process_receipt=lambda receipt: [SimpleNamespace(args=SimpleNamespace(batchId=self.batch_id))]
+        ))
+
+    def get_function_by_name(self, name):
+        return getattr(self.functions, name)
+
+class FakeEth:
+    """Node double: hands out receipts for sent transactions and logs every call order"""
+
+    def __init__(self, pending_count=7):
+        self.pending_count = pending_count
+        self.count_reads = 0
+        self.chain_id_reads = 0
+        self.gas_price_value = 10**9
+        self.gas_price_reads = 0
+        self.sent = []
+        self.log = []
+        self.fail_on_send = None
+        self.revert_sends = set()
+        self.receipts = {}
+        self.contracts = {}
+
+    def get_transaction_count(self, address, block_identifier):
+        assert block_identifier == 'pending'
+        self.count_reads += 1
+        return self.pending_count
+
+    @property
+    def chain_id(self):
+        self.chain_id_reads += 1
+        return 1337
+
+    @property
+    def gas_price(self):
+        self.gas_price_reads += 1
+        return self.gas_price_value
+
+    def get_code(self, address):
+        return b''
+
+    def contract(self, address, abi):
+        return self.contracts.setdefault(address, FakeContract(address))
+
+    def send_raw_transaction(self, raw_transaction):
+        index = len(self.sent)
+        if index == self.fail_on_send:
+            raise ValueError("replacement transaction underpriced")
+        self.sent.append(raw_transaction)
+        tx_hash = Web3.keccak(raw_transaction)
+        self.receipts[tx_hash] = {'status': 0 if index in self.revert_sends else 1, 'blockNumber': 100 + index}
+        self.log.append(('send', index))
+        return tx_hash
+
+    def wait_for_transaction_receipt(self, tx_hash):
+        self.log.append(('wait', tx_hash))
+        return self.receipts[tx_hash]
+
+class FakeWeb3:
+    def __init__(self):
+        self.eth = FakeEth()
+        self.codec = Web3().codec
+
+    solidity_keccak = staticmethod(Web3.solidity_keccak)
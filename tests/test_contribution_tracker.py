@@ -0,0 +1,118 @@
+from datetime import datetime, timedelta
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from app.models.database import User, Contribution, Project
+from app.services import contribution_tracker
+from app.services.contribution_tracker import ContributionTracker
+import aiohttp
+import asyncio
+import logging
+import pytest
+
+def add_contributions(db, project_id, user, *contributions):
+    """Add (type, value, age_days) contributions by ``user`` to a project"""
+    now = datetime.utcnow()
+    db.add_all([
+        Contribution(
+            user_id=user.id,
+            project_id=project_id,
+            type=contribution_type,
+            value=value,
+            created_at=now - timedelta(days=age_days)
+        )
+        for contribution_type, value, age_days in contributions
+    ])
+
+def test_top_contributors_ranked_by_weighted_score(db):
+    project, other = Project(name="payments"), Project(name="other")
+    alice, bob, carol = User(username="alice"), User(username="bob"), User(username="carol")
+    db.add_all([project, other, alice, bob, carol])
+    db.flush()
+    
+    # alice: 3 commits = 3.0; bob: 1 PR (3.0 value, x3 weight) = 9.0; carol: 2 issues = 0.5
+    add_contributions(db, project.id, alice, ("commit", 1.0, 1), ("commit", 1.0, 2), ("commit", 1.0, 3))
+    add_contributions(db, project.id, bob, ("pr", 3.0, 1))
+    add_contributions(db, project.id, carol, ("issue", 0.5, 1), ("issue", 0.5, 1))
+    # Outside the project or the window, so never counted
+    add_contributions(db, other.id, carol, ("pr", 3.0, 1))
+    add_contributions(db, project.id, carol, ("pr", 3.0, 60))
+    db.commit()
+    
+    top = ContributionTracker(db).get_top_contributors(project.id)
+    
+    assert [entry["username"] for entry in top] == ["bob", "alice", "carol"]
+    assert [entry["score"] for entry in top] == [9.0, 3.0, 0.5]
+    assert top[0]["user_id"] == bob.id
+
+def test_top_contributors_limit_and_unknown_types(db):
+    project = Project(name="payments")
+    alice, bob = User(username="alice"), User(username="bob")
+    db.add_all([project, alice, bob])
+    db.flush()
+    
+    add_contributions(db, project.id, alice, ("commit", 1.0, 1))
+    add_contributions(db, project.id, bob, ("review", 5.0, 1))
+    db.commit()
+    
+    tracker = ContributionTracker(db)
+    
+    assert tracker.get_top_contributors(project.id, limit=1) == [
+        {"user_id": alice.id, "username": "alice", "score": 1.0}
+    ]
+    # Unweighted types score zero but the contributor is still listed
+    assert tracker.get_top_contributors(project.id)[1]["score"] == 0.0
+    # The SQL ranking agrees with the per-user score
+    assert tracker.calculate_contribution_score(alice.id, project.id) == 1.0
+
+def fetch_listing(monkeypatch, total_pages, fail_page=None):
+    """Fetch a pull request listing from a fake GitHub API serving two items per page"""
+    queries = []
+    
+    async def pulls(request):
+        page = int(request.query.get("page", 1))
+        queries.append(dict(request.query))
+        assert request.headers["Authorization"] == "token your_github_token"
+        if page == fail_page:
+            return web.json_response({"message": "API rate limit exceeded"}, status=403)
+        headers = {}
+        if total_pages > 1:
+            headers["Link"] = '<%s>; rel="last"' % request.url.update_query(page=total_pages)
+        return web.json_response([{"page": page, "index": index} for index in range(2)], headers=headers)
+    
+    async def run():
+        app = web.Application()
+        app.router.add_get("/repos/owner/repo/pulls", pulls)
+        async with TestServer(app) as server:
+            monkeypatch.setattr(contribution_tracker, "GITHUB_API_URL", str(server.make_url("/")).rstrip("/"))
+            async with ContributionTracker(db=None) as tracker:
+                return await tracker._fetch_github_data(tracker._get_session(), "repos/owner/repo/pulls?state=all")
+    
+    return asyncio.run(run()), queries
+
+def test_github_listing_reads_every_page(monkeypatch):
+    items, queries = fetch_listing(monkeypatch, total_pages=3)
+    
+    assert [(item["page"], item["index"]) for item in items] == [(1, 0), (1, 1), (2, 0), (2, 1), (3, 0), (3, 1)]
+    assert all(query["per_page"] == "100" and query["state"] == "all" for query in queries)
+    assert sorted(query.get("page", "1") for query in queries) == ["1", "2", "3"]
+
+def test_github_listing_single_page(monkeypatch):
+    items, queries = fetch_listing(monkeypatch, total_pages=1)
+    
+    assert len(items) == 2
+    assert len(queries) == 1
+
+def test_github_listing_warns_when_capped(monkeypatch, caplog):
+    monkeypatch.setattr(contribution_tracker, "GITHUB_MAX_PAGES", 2)
+    
+    with caplog.at_level(logging.WARNING, logger=contribution_tracker.__name__):
+        items, queries = fetch_listing(monkeypatch, total_pages=5)
+    
+    assert len(items) == 4
+    assert "Reading 2 of 5 pages" in caplog.text
+
+def test_github_listing_raises_on_error_page(monkeypatch):
+    with pytest.raises(aiohttp.ClientResponseError) as excinfo:
+        fetch_listing(monkeypatch, total_pages=3, fail_page=2)
+    
+    assert excinfo.value.status == 403
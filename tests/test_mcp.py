@@ -0,0 +1,68 @@
+from app.core import mcp
+from app.core.mcp import MCPPaymentModel, PaymentContext, PaymentType
+import pytest
+
+def make_context(contributions, amount=10.0, payment_type=PaymentType.CONTRIBUTION):
+    return PaymentContext(
+        payment_type=payment_type,
+        amount=amount,
+        currency="ETH",
+        recipients=list(contributions),
+        metadata={"contributions": contributions}
+    )
+
+@pytest.fixture
+def model(monkeypatch):
+    model = MCPPaymentModel()
+    calls = []
+    calculate = model._calculate_ratios
+    
+    def counting_calculate(*args):
+        calls.append(args)
+        return calculate(*args)
+    
+    monkeypatch.setattr(model, "_calculate_ratios", counting_calculate)
+    model.calls = calls
+    return model
+
+def test_distribution_by_contribution(model):
+    assert model.calculate_distribution(make_context({"a": 1, "b": 3})) == {"a": 2.5, "b": 7.5}
+    assert model.calculate_distribution(make_context({"a": 0, "b": 0})) == {"a": 5.0, "b": 5.0}
+    assert model.calculate_distribution(make_context({"a": 1}, amount=0)) == {"a": 0.0}
+    assert model.calculate_distribution(make_context({})) == {}
+
+def test_ratio_cache_hits_for_equal_content(model):
+    model.calculate_distribution(make_context({"a": 1, "b": 3}))
+    distribution = model.calculate_distribution(make_context({"a": 1, "b": 3}, amount=20.0))
+    
+    # A new but equal context reuses the ratios; only the amount differs
+    assert distribution == {"a": 5.0, "b": 15.0}
+    assert len(model.calls) == 1
+
+def test_ratio_cache_misses_when_content_changes(model):
+    model.calculate_distribution(make_context({"a": 1, "b": 3}))
+    model.calculate_distribution(make_context({"a": 3, "b": 1}))
+    model.calculate_distribution(make_context({"a": 1, "b": 3}, payment_type=PaymentType.TIME_BASED))
+    
+    assert len(model.calls) == 3
+
+def test_ratio_cache_is_bounded(model, monkeypatch):
+    monkeypatch.setattr(mcp, "RATIO_CACHE_SIZE", 2)
+    
+    for weight in (1, 2, 3):
+        model.calculate_distribution(make_context({"a": weight, "b": 1}))
+    model.calculate_distribution(make_context({"a": 3, "b": 1}))
+    model.calculate_distribution(make_context({"a": 1, "b": 1}))
+    
+    assert len(model._ratio_cache) == 2
+    # The newest entry was still cached; the oldest had been evicted
+    assert len(model.calls) == 4
+
+def test_unserializable_metadata_skips_the_cache(model):
+    context = make_context({"a": 1})
+    context.metadata["extra"] = object()
+    
+    assert model.calculate_distribution(context) == {"a": 10.0}
+    assert model.calculate_distribution(context) == {"a": 10.0}
+    assert len(model.calls) == 2
+    assert len(model._ratio_cache) == 0
@@ -0,0 +1,80 @@
+from types import SimpleNamespace
+from web3 import Web3
+from app.core import multicall
+from app.core.multicall import Multicall
+from tests.fakes import FakeContract, FakeWeb3
+
+TARGET = Web3.to_checksum_address('0x' + '11' * 20)
+ALICE = Web3.to_checksum_address('0x' + 'aa' * 20)
+
+# A getter returning a struct field alongside plain values
+ABI = [{
+    'name': 'batchPayments',
+    'type': 'function',
+    'stateMutability': 'view',
+    'inputs': [{'name': '', 'type': 'bytes32'}, {'name': '', 'type': 'uint256'}],
+    'outputs': [
+        {'name': 'recipient', 'type': 'address'},
+        {'name': 'amount', 'type': 'uint256'},
+        {'name': 'meta', 'type': 'tuple', 'components': [
+            {'name': 'processed', 'type': 'bool'},
+            {'name': 'signature', 'type': 'bytes'},
+        ]},
+    ],
+}]
+
+class FakeAggregator:
+    """Stands in for Multicall3, answering aggregate3 with preset return data"""
+
+    def __init__(self, return_data):
+        self.address = multicall.MULTICALL3_ADDRESS
+        self.calls = []
+        self.functions = SimpleNamespace(aggregate3=self._aggregate3)
+        self._return_data = return_data
+
+    def _aggregate3(self, calls):
+        self.calls.append(calls)
+        return SimpleNamespace(call=lambda: [(True, data) for data in self._return_data])
+
+def test_aggregates_calls_and_decodes_tuple_outputs(monkeypatch):
+    web3 = Web3()
+    contract = web3.eth.contract(address=TARGET, abi=ABI)
+    output_types = ['address', 'uint256', '(bool,bytes)']
+    expected = [(ALICE.lower(), index, (index == 1, b'sig')) for index in range(2)]
+    
+    aggregator = Multicall(web3)
+    aggregator.contract = FakeAggregator([web3.codec.encode(output_types, list(values)) for values in expected])
+    monkeypatch.setattr(multicall, '_is_deployed', lambda web3, address: True)
+    
+    batch_id = '0x' + 'ab' * 32
+    results = aggregator.call(contract, 'batchPayments', [(batch_id, 0), (batch_id, 1)])
+    
+    assert results == expected
+    (calls,) = aggregator.contract.calls
+    assert calls == [
+        (TARGET, False, contract.encodeABI(fn_name='batchPayments', args=(batch_id, index)))
+        for index in range(2)
+    ]
+
+def test_falls_back_to_single_calls_without_multicall():
+    web3 = FakeWeb3()
+    contract = FakeContract(TARGET)
+    contract.views[('batchPayments', 'b', 0)] = (ALICE, 1, False)
+    contract.views[('owner',)] = ALICE
+    aggregator = Multicall(web3)
+    
+    assert aggregator.call(contract, 'batchPayments', [('b', 0)]) == [(ALICE, 1, False)]
+    assert aggregator.call(contract, 'owner', [()]) == [(ALICE,)]
+    assert aggregator.call(contract, 'owner', []) == []
+
+def test_deployment_checked_once_per_client_and_address():
+    web3 = FakeWeb3()
+    code_reads = []
+    web3.eth.get_code = lambda address: code_reads.append(address) or b''
+    contract = FakeContract(TARGET)
+    contract.views[('owner',)] = ALICE
+    
+    for _ in range(3):
+        Multicall(web3).call(contract, 'owner', [()])
+    
+    assert code_reads == [Web3.to_checksum_address(multicall.MULTICALL3_ADDRESS)]
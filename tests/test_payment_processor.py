@@ -0,0 +1,73 @@
+from eth_account import Account
+from web3 import Web3
+from app.core import payment_processor
+from app.core.payment_processor import PaymentProcessor
+from tests.fakes import FakeWeb3
+import asyncio
+import pytest
+
+ALICE = '0x' + 'aa' * 20
+BOB = '0x' + 'bb' * 20
+CONTRACT = '0x' + '11' * 20
+
+@pytest.fixture
+def processor(monkeypatch):
+    web3 = FakeWeb3()
+    monkeypatch.setenv('SIGNER_PRIVATE_KEY', Account.create().key.hex())
+    monkeypatch.setenv('PAYMENT_DISTRIBUTOR_ADDRESS', CONTRACT)
+    monkeypatch.setattr(payment_processor, 'get_web3', lambda endpoint_uri: web3)
+    monkeypatch.setattr(payment_processor, 'load_abi', lambda path: [])
+    return PaymentProcessor()
+
+def preset_batch(processor, entries):
+    """Make batchPayments return ``(recipient, amount, processed)`` for each index"""
+    contract = processor.contract
+    for index, entry in enumerate(entries):
+        contract.views[('batchPayments', contract.batch_id.hex(), index)] = entry
+
+def test_process_payments_pays_each_entry(processor):
+    eth = processor.web3.eth
+    preset_batch(processor, [(ALICE, 10**18, False), (BOB, 2 * 10**18, False)])
+
+    results = asyncio.run(processor.process_payments({ALICE: 1.0, BOB: 2.0}))
+
+    calls = processor.contract.built
+    assert [name for name, _ in calls] == ['createBatch', 'processPayment', 'processPayment']
+    batch_id = processor.contract.batch_id.hex()
+    assert calls[0][1] == ([Web3.to_checksum_address(ALICE), Web3.to_checksum_address(BOB)], [10**18, 2 * 10**18])
+    assert [args[:2] for _, args in calls[1:]] == [(batch_id, 0), (batch_id, 1)]
+    assert [result['status'] for result in results] == ['success', 'success']
+    assert [result['block_number'] for result in results] == [101, 102]
+
+    # Both payouts go out before either receipt is awaited
+    assert [entry[0] for entry in eth.log[2:]] == ['send', 'send', 'wait', 'wait']
+
+def test_process_payments_reports_reverted_and_unsent_payouts(processor):
+    eth = processor.web3.eth
+    preset_batch(processor, [(ALICE, 10**18, False), (BOB, 2 * 10**18, False)])
+    eth.revert_sends = {1}
+
+    results = asyncio.run(processor.process_payments({ALICE: 1.0, BOB: 2.0}))
+
+    assert results[0]['status'] == 'failed'
+    assert results[0]['error'] == 'Transaction failed'
+    assert results[1]['status'] == 'success'
+
+    eth.fail_on_send = len(eth.sent) + 1
+    results = asyncio.run(processor.process_payments({ALICE: 1.0, BOB: 2.0}))
+
+    assert results[1] == {'status': 'failed', 'transaction_hash': None, 'error': 'replacement transaction underpriced'}
+
+def test_process_payments_checks_the_batch_before_paying(processor):
+    preset_batch(processor, [(ALICE, 10**18, False), (BOB, 10**18, False)])
+
+    with pytest.raises(ValueError, match="Amount mismatch"):
+        asyncio.run(processor.process_payments({ALICE: 1.0, BOB: 2.0}))
+
+    assert [name for name, _ in processor.contract.built] == ['createBatch']
+
+def test_create_batch_raises_on_revert(processor):
+    processor.web3.eth.revert_sends = {0}
+
+    with pytest.raises(ValueError, match="reverted"):
+        processor.create_batch([ALICE], [10**18])
@@ -0,0 +1,158 @@
+from datetime import datetime, timedelta
+from eth_account import Account
+from sqlalchemy import select
+from app.core.mcp import PaymentType
+from app.models.database import Payment, User
+from app.services import payment_service
+from app.services.payment_service import PaymentService
+from tests.fakes import FakeWeb3
+import asyncio
+import pytest
+
+CONTRACT = '0x' + '11' * 20
+ALICE = '0x' + 'aa' * 20
+BOB = '0x' + 'bb' * 20
+
+@pytest.fixture
+def service(db, monkeypatch):
+    web3 = FakeWeb3()
+    monkeypatch.setattr(payment_service, 'get_web3', lambda endpoint_uri: web3)
+    monkeypatch.setattr(payment_service, 'load_abi', lambda path: [])
+    monkeypatch.setenv('SIGNER_PRIVATE_KEY', Account.create().key.hex())
+    return PaymentService(db, 'http://localhost:8545', CONTRACT)
+
+def add_payments(db, count, project_id=1):
+    """Add ``count`` payments to one recipient, two per created_at instant"""
+    user = User(username="alice", address="0x" + "aa" * 20)
+    db.add(user)
+    db.flush()
+    start = datetime(2026, 1, 1)
+    db.add_all([
+        Payment(
+            project_id=project_id,
+            recipient_id=user.id,
+            amount=float(index),
+            status="completed",
+            tx_hash="0x" + "cd" * 32,
+            created_at=start + timedelta(seconds=index // 2)
+        )
+        for index in range(count)
+    ])
+    db.commit()
+    return user
+
+def test_history_pages_through_every_row_once(service, db):
+    add_payments(db, 7)
+    
+    pages = [service.get_payment_history(project_id=1, limit=3)]
+    while pages[-1]["next_cursor"] is not None:
+        pages.append(service.get_payment_history(project_id=1, limit=3, **pages[-1]["next_cursor"]))
+    
+    ids = [payment["id"] for page in pages for payment in page["payments"]]
+    assert ids == [7, 6, 5, 4, 3, 2, 1]
+    assert [len(page["payments"]) for page in pages] == [3, 3, 1]
+    assert isinstance(pages[0]["next_cursor"]["before"], datetime)
+
+def test_history_filters_and_bounds_the_page(service, db):
+    user = add_payments(db, 5)
+    
+    assert service.get_payment_history(project_id=2)["payments"] == []
+    
+    page = service.get_payment_history(user_id=user.id, limit=10**6)
+    assert len(page["payments"]) == 5
+    assert page["next_cursor"] is None
+    assert page["payments"][0] == {
+        "id": 5,
+        "recipient": "alice",
+        "amount": 4.0,
+        "currency": None,
+        "payment_type": None,
+        "status": "completed",
+        "tx_hash": "0x" + "cd" * 32,
+        "created_at": "2026-01-01T00:00:02",
+    }
+    
+    # Only a timestamp: rows at that instant are treated as already seen
+    page = service.get_payment_history(limit=2, before=datetime(2026, 1, 1, 0, 0, 2))
+    assert [payment["id"] for payment in page["payments"]] == [4, 3]
+
+def test_history_default_limit(service, db):
+    add_payments(db, payment_service.HISTORY_PAGE_SIZE + 1)
+    
+    page = service.get_payment_history()
+    
+    assert len(page["payments"]) == payment_service.HISTORY_PAGE_SIZE
+    assert page["next_cursor"] is not None
+
+def batch_rows(db, batch_id):
+    return db.execute(
+        select(Payment.status, Payment.tx_hash).where(Payment.batch_id == batch_id)
+    ).all()
+
+def create_batch(service, distributions=None):
+    return service.create_batch_payment(
+        project_id=1,
+        payment_type=PaymentType.CONTRIBUTION,
+        distributions=distributions or {ALICE: 1.0, BOB: 2.0},
+        currency="ETH"
+    )
+
+def test_create_batch_payment_records_pending_rows_and_hash(service, db):
+    batch_id = create_batch(service)
+    
+    eth = service.w3.eth
+    assert len(eth.sent) == 1
+    tx_hash = next(iter(eth.receipts)).hex()
+    assert batch_rows(db, batch_id) == [("pending", tx_hash), ("pending", tx_hash)]
+    assert db.query(User).count() == 2
+    
+    name, args = service.contract.built[0]
+    assert name == "createBatch"
+    assert args[0].hex() == batch_id
+    assert args[1:] == ([ALICE, BOB], [10**18, 2 * 10**18])
+
+def test_create_batch_payment_marks_rows_failed_when_send_fails(service, db):
+    service.w3.eth.fail_on_send = 0
+    
+    with pytest.raises(ValueError):
+        create_batch(service)
+    
+    (batch_id,) = db.execute(select(Payment.batch_id).distinct()).scalars()
+    assert batch_rows(db, batch_id) == [("failed", ""), ("failed", "")]
+
+def test_process_batch_payment_completes_rows(service, db):
+    batch_id = create_batch(service)
+    
+    result = service.process_batch_payment(batch_id)
+    
+    assert result["status"] == "success"
+    assert result["payments_processed"] == 2
+    assert {status for status, _ in batch_rows(db, batch_id)} == {"completed"}
+
+def test_process_batch_payment_reports_revert_and_unknown_batch(service, db):
+    batch_id = create_batch(service)
+    service.w3.eth.revert_sends = {1}
+    
+    result = service.process_batch_payment(batch_id)
+    assert result["status"] == "failed"
+    assert result["error"] == "Transaction failed"
+    assert {status for status, _ in batch_rows(db, batch_id)} == {"pending"}
+    
+    result = service.process_batch_payment("0x" + "ee" * 32)
+    assert result["status"] == "failed"
+    assert result["error"] == "No payments recorded for batch"
+
+def test_process_batch_payments_reports_each_batch(service, db):
+    batch_ids = [create_batch(service, {address: 1.0}) for address in (ALICE, BOB, "0x" + "cc" * 20)]
+    eth = service.w3.eth
+    # processBatch sends are 3, 4 and 5: the first reverts, the last is rejected
+    eth.revert_sends = {3}
+    eth.fail_on_send = 5
+    
+    results = asyncio.run(service.process_batch_payments(batch_ids))
+    
+    assert [result["status"] for result in results] == ["failed", "success", "failed"]
+    assert results[0]["tx_hash"] is not None
+    assert results[1]["tx_hash"] is not None
+    assert results[2]["tx_hash"] is None
+    assert [batch_rows(db, batch_id)[0][0] for batch_id in batch_ids] == ["pending", "completed", "pending"]
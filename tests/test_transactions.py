@@ -0,0 +1,102 @@
+from types import SimpleNamespace
+from web3 import Web3
+from app.core import transactions
+from app.core.transactions import TxParamsCache, ether_to_wei, send_transactions
+from tests.fakes import FakeContract, FakeWeb3
+import pytest
+
+@pytest.mark.parametrize("ether", [
+    0,
+    1,
+    1e-18,
+    1e-10,
+    0.1 + 0.2,
+    100 / 3,
+    123.456789012,
+    9_000_000.5,
+    10**9,
+])
+def test_ether_to_wei_matches_to_wei(ether):
+    assert ether_to_wei([ether]) == [Web3.to_wei(ether, 'ether')]
+
+def test_ether_to_wei_keeps_sub_gwei_precision():
+    amounts = ether_to_wei([100 / 3, 5e-10])
+    
+    assert amounts == [33333333333333336000, 500000000]
+    assert all(isinstance(amount, int) for amount in amounts)
+
+@pytest.fixture
+def cache():
+    return TxParamsCache(FakeWeb3(), '0x' + '11' * 20)
+
+class FakeAccount:
+    def sign_transaction(self, tx):
+        return SimpleNamespace(rawTransaction=bytes([tx['nonce']]))
+
+def test_reserves_consecutive_nonces_from_one_node_read(cache):
+    with cache.reserve_nonces(3) as nonces:
+        assert list(nonces) == [7, 8, 9]
+    with cache.reserve_nonces() as nonces:
+        assert list(nonces) == [10]
+    
+    assert cache.web3.eth.count_reads == 1
+
+def test_failure_inside_reservation_resyncs_from_node(cache):
+    with pytest.raises(RuntimeError):
+        with cache.reserve_nonces(2):
+            raise RuntimeError("signing failed")
+    
+    # The node never saw nonces 7 and 8, so they are handed out again
+    with cache.reserve_nonces() as nonces:
+        assert list(nonces) == [7]
+    assert cache.web3.eth.count_reads == 2
+
+def test_reset_rereads_nonce_and_gas_price(cache):
+    with cache.reserve_nonces():
+        cache.gas_price()
+    cache.web3.eth.pending_count = 12
+    cache.web3.eth.gas_price_value = 3 * 10**9
+    cache.reset()
+    
+    with cache.reserve_nonces() as nonces:
+        assert list(nonces) == [12]
+    assert cache.gas_price() == 3 * 10**9
+
+def test_gas_price_refetched_after_ttl(cache, monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(transactions.time, 'monotonic', lambda: now[0])
+    
+    cache.gas_price()
+    now[0] += cache.gas_price_ttl / 2
+    cache.gas_price()
+    assert cache.web3.eth.gas_price_reads == 1
+    
+    now[0] += cache.gas_price_ttl
+    cache.gas_price()
+    assert cache.web3.eth.gas_price_reads == 2
+
+def test_build_fetches_chain_id_once(cache):
+    params = [cache.build(nonce) for nonce in (7, 8)]
+    
+    assert params[1] == {
+        'from': cache.address,
+        'chainId': 1337,
+        'gas': 2000000,
+        'gasPrice': 10**9,
+        'nonce': 8,
+    }
+    assert cache.web3.eth.chain_id_reads == 1
+
+def test_send_transactions_stops_at_rejected_send(cache):
+    cache.web3.eth.fail_on_send = 1
+    functions = [FakeContract('0x' + '22' * 20).functions.pay(index) for index in range(3)]
+    
+    results = send_transactions(cache, FakeAccount(), functions)
+    
+    assert results[0] == Web3.keccak(bytes([7]))
+    assert isinstance(results[1], ValueError) and results[2] is results[1]
+    assert cache.web3.eth.sent == [bytes([7])]
+    # The tracked nonce was dropped, so the next reservation asks the node again
+    with cache.reserve_nonces():
+        pass
+    assert cache.web3.eth.count_reads == 2